@@ -3,73 +3,334 @@ Document extraction module for Criticat.
 Handles PDF to image conversion and encoding.
 """
 
-import base64
+import asyncio
+import hashlib
 import io
 import logging
+import os
+from pathlib import Path
+import shutil
+import threading
+import time
 from typing import List
+from uuid import uuid4
 
-from pdf2image import convert_from_path
 from PIL import Image
+import pypdfium2 as pdfium
 
 
 logger = logging.getLogger(__name__)
 
+# Extracted page images live here, outside of the graph state, so the
+# multi-MB payload is not copied on every node transition.
+_IMAGE_STORE: dict[str, list[bytes]] = {}
+
+# pdfium is not thread-safe, not even across separate documents, so every
+# open/render/close in the process is serialized on this lock.
+_PDFIUM_LOCK = threading.Lock()
+
+# Cached pages are renders of user documents; entries older than this are
+# ignored and deleted the next time pages are cached.
+PAGE_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+# Resolution PDF pages are rendered at; PDF user space is 72 points per inch.
+RENDER_DPI = 200
+
+# Pages are downscaled to fit this box before encoding; the reviewer does
+# not need full rasterization resolution to judge layout.
+MAX_IMAGE_SIZE = (2048, 2048)
+JPEG_QUALITY = 80
+# Chroma subsampling passed to Pillow; 2 is 4:2:0
+JPEG_SUBSAMPLING = 2
+
+
+def _pdf_digest(pdf_path: str) -> str:
+    """
+    Compute the content hash used as the page cache key for a PDF.
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _page_cache_enabled() -> bool:
+    """
+    Check whether the on-disk page cache is enabled.
+
+    Encoded pages are cached by PDF content hash, so re-reviewing an
+    unchanged document skips rendering and encoding entirely. The cache
+    keeps renders of user documents on disk, so it is opt-in: set
+    CRITICAT_PAGE_CACHE=1 to enable it.
+
+    Returns:
+        Whether pages are read from and written to the cache
+    """
+    return os.environ.get("CRITICAT_PAGE_CACHE") == "1"
+
+
+def _page_cache_root() -> Path:
+    """
+    Get the directory holding the page cache.
+
+    Resolved on use, so an unset or empty XDG_CACHE_HOME falls back to
+    ~/.cache without touching the home directory at import time.
+
+    Returns:
+        Page cache directory
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "criticat"
+
+
+def _page_cache_dir(pdf_path: str) -> Path:
+    """
+    Get the page cache directory of a PDF.
+
+    The directory is keyed by the PDF contents and by every render and
+    encoding setting (DPI, size limit, JPEG quality and subsampling), so
+    changing any of them never serves stale pages.
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        Cache directory of the PDF
+    """
+    width, height = MAX_IMAGE_SIZE
+    return _page_cache_root() / (
+        f"{_pdf_digest(pdf_path)}-{RENDER_DPI}dpi-{width}x{height}"
+        f"-q{JPEG_QUALITY}-s{JPEG_SUBSAMPLING}"
+    )
+
+
+def _load_cached_pages(cache_dir: Path) -> list[bytes]:
+    """
+    Load previously encoded pages from the page cache.
+
+    Entries older than PAGE_CACHE_MAX_AGE count as a miss.
+
+    Args:
+        cache_dir: Cache directory of a single PDF
+
+    Returns:
+        JPEG-encoded pages in document order, empty on a cache miss
+    """
+    try:
+        if time.time() - cache_dir.stat().st_mtime > PAGE_CACHE_MAX_AGE:
+            return []
+    except OSError:
+        return []
+    return [
+        page_path.read_bytes() for page_path in sorted(cache_dir.glob("page-*.jpg"))
+    ]
+
+
+def _prune_page_cache() -> None:
+    """
+    Delete page cache entries older than PAGE_CACHE_MAX_AGE.
+
+    Leftover temporary directories of interrupted writes are deleted too.
+    """
+    expires_before = time.time() - PAGE_CACHE_MAX_AGE
+    try:
+        entries = list(_page_cache_root().iterdir())
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < expires_before:
+                shutil.rmtree(entry)
+        except OSError as e:
+            logger.warning("Failed to prune page cache entry %s: %s", entry, e)
+
+
+def _store_cached_pages(cache_dir: Path, pages: list[bytes]) -> None:
+    """
+    Write encoded pages to the page cache.
+
+    Expired entries are pruned first. Pages are written to a temporary
+    sibling directory that is renamed into place, so concurrent reviews
+    never observe a partially written entry. Failures are logged and
+    otherwise ignored.
+
+    Args:
+        cache_dir: Cache directory of a single PDF
+        pages: JPEG-encoded pages in document order
+    """
+    _prune_page_cache()
+    tmp_dir = cache_dir.with_name(f"{cache_dir.name}.{uuid4().hex}.tmp")
+    try:
+        tmp_dir.mkdir(parents=True)
+        for page_number, page in enumerate(pages, start=1):
+            (tmp_dir / f"page-{page_number:04d}.jpg").write_bytes(page)
+        tmp_dir.rename(cache_dir)
+    except OSError as e:
+        # A concurrent review of the same PDF may have stored it first
+        if not cache_dir.is_dir():
+            logger.warning("Failed to cache PDF pages in %s: %s", cache_dir, e)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _render_scale(page: pdfium.PdfPage) -> float:
+    """
+    Get the scale to render a PDF page at.
+
+    Pages are rendered at RENDER_DPI, or smaller if that would exceed
+    MAX_IMAGE_SIZE, so they come out of pdfium at their final size and do
+    not need to be resampled before encoding.
+
+    Args:
+        page: PDF page to render
+
+    Returns:
+        Render scale, in pixels per PDF point
+    """
+    width, height = page.get_size()
+    return min(
+        RENDER_DPI / 72,
+        MAX_IMAGE_SIZE[0] / width,
+        MAX_IMAGE_SIZE[1] / height,
+    )
+
 
 def convert_pdf_to_images(pdf_path: str) -> List[Image.Image]:
     """
     Convert a PDF file to a list of PIL Image objects.
 
+    Safe to call from several threads at once: the whole conversion holds
+    the process-wide pdfium lock.
+
     Args:
         pdf_path: Path to the PDF file
-        first_page_only: Whether to convert only the first page
 
     Returns:
         List of PIL Image objects
     """
-    logger.info(f"Converting PDF to images: {pdf_path}")
+    logger.info("Converting PDF to images: %s", pdf_path)
     try:
-        images = convert_from_path(pdf_path, fmt="jpeg")
-        if images:
-            return images
-        return images
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                return [page.render(scale=_render_scale(page)).to_pil() for page in pdf]
+            finally:
+                pdf.close()
     except Exception as e:
-        logger.error(f"Failed to convert PDF to images: {e}")
+        logger.error("Failed to convert PDF to images: %s", e)
         raise
 
 
-def encode_image_to_base64(image: Image.Image) -> str:
+def encode_image_to_jpeg(image: Image.Image) -> bytes:
     """
-    Encode a PIL Image to base64 string.
+    Encode a PIL Image to JPEG bytes.
+
+    The image is downscaled in place to fit MAX_IMAGE_SIZE before it is
+    encoded; pages rendered by convert_pdf_to_images already fit.
 
     Args:
         image: PIL Image object
 
     Returns:
-        Base64-encoded string
+        JPEG-encoded image
     """
+    image.thumbnail(MAX_IMAGE_SIZE)
     buffer = io.BytesIO()
-    image.save(buffer, format="JPEG")
-    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+    image.save(
+        buffer, format="JPEG", quality=JPEG_QUALITY, subsampling=JPEG_SUBSAMPLING
+    )
+    return buffer.getvalue()
 
 
-def extract_document_image(pdf_path: str) -> list[str]:
+async def aextract_document_image(pdf_path: str) -> list[bytes]:
     """
-    Extract the first page of a PDF as a base64-encoded image.
+    Extract the pages of a PDF as JPEG-encoded images without blocking.
+
+    Rendering runs on a worker thread under the process-wide pdfium lock,
+    so concurrent extractions render one document at a time; then every
+    page is downscaled and encoded on its own worker thread. Pillow
+    releases the GIL while doing so, which lets the pages encode in
+    parallel.
 
     Args:
         pdf_path: Path to the PDF file
 
     Returns:
-        list[str]: List of base64-encoded image strings
+        list[bytes]: JPEG-encoded pages in document order
     Raises:
         ValueError: If no images are extracted from the PDF
     """
-    logger.info(f"Extracting document image from PDF: {pdf_path}")
-    images = convert_pdf_to_images(pdf_path)
+    logger.info("Extracting document image from PDF: %s", pdf_path)
+    cache_dir = None
+    if _page_cache_enabled():
+        cache_dir = await asyncio.to_thread(_page_cache_dir, pdf_path)
+        document_images = await asyncio.to_thread(_load_cached_pages, cache_dir)
+        if document_images:
+            logger.info("Loaded %s cached pages for %s", len(document_images), pdf_path)
+            return document_images
+
+    images = await asyncio.to_thread(convert_pdf_to_images, pdf_path)
     if not images:
         logger.error("No images extracted from PDF")
         raise ValueError("No images extracted from PDF")
 
-    logger.info(f"Extracted {len(images)} images from PDF")
+    logger.info("Extracted %s images from PDF", len(images))
 
-    return [encode_image_to_base64(image) for image in images]
+    document_images = await asyncio.gather(
+        *[asyncio.to_thread(encode_image_to_jpeg, image) for image in images]
+    )
+    if cache_dir is not None:
+        await asyncio.to_thread(_store_cached_pages, cache_dir, document_images)
+    return document_images
+
+
+def new_document_ref() -> str:
+    """
+    Create a handle under which page images can be stored.
+
+    Returns:
+        Handle to pass through the graph state
+    """
+    return f"img::{uuid4().hex}"
+
+
+def store_document_images(document_ref: str, document_images: list[bytes]) -> None:
+    """
+    Keep encoded page images out of band, under a handle.
+
+    Args:
+        document_ref: Handle returned by new_document_ref
+        document_images: JPEG-encoded pages in document order
+    """
+    _IMAGE_STORE[document_ref] = document_images
+
+
+def pop_document_images(document_ref: str) -> list[bytes]:
+    """
+    Retrieve and release the page images stored under a handle.
+
+    Args:
+        document_ref: Handle returned by new_document_ref
+
+    Returns:
+        list[bytes]: JPEG-encoded pages in document order
+
+    Raises:
+        KeyError: If the handle is unknown or was already released
+    """
+    return _IMAGE_STORE.pop(document_ref)
+
+
+def discard_document_images(document_ref: str) -> None:
+    """
+    Release the page images stored under a handle, if any are left.
+
+    Args:
+        document_ref: Handle returned by new_document_ref
+    """
+    _IMAGE_STORE.pop(document_ref, None)
@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field, SecretStr
+from pydantic import BaseModel, ConfigDict, Field, SecretStr
 
 
 class GithubConfig(BaseModel):
     """Configuration for the Criticat application."""
 
+    # Only needed when commenting on a PR, so build the schema on first use
+    model_config = ConfigDict(defer_build=True)
+
     github_token: SecretStr = Field(description="GitHub token for API access")
     repository: str = Field(description="GitHub repository in format owner/repo")
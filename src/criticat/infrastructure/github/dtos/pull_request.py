@@ -1,9 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class PRCommentPayload(BaseModel):
     """Payload for the GitHub PR comment."""
 
+    # Only needed when commenting on a PR, so build the schema on first use
+    model_config = ConfigDict(defer_build=True)
+
     repository: str = Field(description="GitHub repository in format owner/repo")
     pr_number: int = Field(description="Pull request number to comment on")
     body: str = Field(description="Comment body")
@@ -6,13 +6,47 @@ Handles GitHub API interactions for PR comments.
 from logging import getLogger, Logger
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from criticat.infrastructure.github.config import GithubConfig
-from pydantic import BaseModel, PrivateAttr
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from criticat.infrastructure.github.dtos.pull_request import PRCommentPayload
 
 
+def _create_session() -> requests.Session:
+    """
+    Create a pooled HTTP session for the GitHub API.
+
+    The session keeps TLS connections to api.github.com alive between
+    requests. Only failed connection attempts are retried: a comment POST
+    that reached GitHub is never sent again, so it cannot be duplicated.
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    session.headers.update(
+        {
+            "Accept": "application/vnd.github.v3+json",
+            "Content-Type": "application/json",
+        }
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(connect=3, read=0, status=0, other=0, backoff_factor=0.3),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+_SESSION = _create_session()
+
+
 class PullRequestService(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     config: GithubConfig
     _logger: Logger = PrivateAttr(default=getLogger(__name__))
 
@@ -21,7 +55,7 @@ class PullRequestService(BaseModel):
         Add a comment to a GitHub pull request using the GitHub API.
 
         Args:
-            payload: PRCommentPayload containing repository, PR number, comment body and token
+            payload: PRCommentPayload containing repository, PR number and comment body
 
         Returns:
             True if comment was successfully added, False otherwise
@@ -30,14 +64,14 @@ class PullRequestService(BaseModel):
 
         url = f"https://api.github.com/repos/{payload.repository}/issues/{payload.pr_number}/comments"
         headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"token {self.config.github_token}",
-            "Content-Type": "application/json",
+            "Authorization": f"token {self.config.github_token.get_secret_value()}",
         }
-        data = {"body": payload.body}
+        # Serialized by pydantic-core; the session already sends the JSON
+        # Content-Type header
+        data = payload.model_dump_json(include={"body"}).encode()
 
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = _SESSION.post(url, headers=headers, data=data, timeout=10)
             response.raise_for_status()
             self._logger.info(
                 f"Successfully commented on PR {payload.repository}#{payload.pr_number}"
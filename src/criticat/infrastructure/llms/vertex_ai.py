@@ -3,10 +3,10 @@ LLM integration module for Criticat.
 Handles Vertex AI Gemini model interactions.
 """
 
-from functools import partial
+from base64 import b64encode
+from functools import lru_cache
 from json import dumps
 import logging
-from operator import itemgetter
 from typing import Any, TypedDict
 
 from google.cloud import aiplatform
@@ -14,7 +14,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_vertexai import ChatVertexAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableSerializable, RunnableLambda
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 
 from criticat.models.formatting import FormatReview
 from criticat.infrastructure.llms.prompts import (
@@ -27,13 +27,30 @@ from criticat.infrastructure.llms.prompts import (
 
 logger = logging.getLogger(__name__)
 
+# Static text of the review request, rendered once. It comes right after the
+# system prompt and before the page images so every request shares the same
+# prefix, which Gemini can serve from its implicit cache; nothing
+# request-specific may be added to it.
+_REVIEW_INSTRUCTIONS = REVIEW_HUMAN_PROMPT.format(
+    schema=dumps(FormatReview.model_json_schema(), indent=2)
+)
+_REVIEW_SYSTEM_MESSAGE = SystemMessage(content=REVIEW_SYSTEM_PROMPT)
+
+# The joke prompt only depends on constants, so it is compiled once
+_JOKE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", CAT_JOKE_SYSTEM_PROMPT),
+        ("user", CAT_JOKE_HUMAN_PROMPT),
+    ]
+)
+
 
 class ReviewFeedbackInput(TypedDict):
     """
     Input type for review feedback.
     """
 
-    document_images: list[str]
+    document_images: list[bytes]
 
 
 def initialize_vertex_ai(project_id: str, location: str) -> None:
@@ -44,14 +61,19 @@ def initialize_vertex_ai(project_id: str, location: str) -> None:
         project_id: Google Cloud project ID
         location: Google Cloud location
     """
-    logger.info(f"Initializing Vertex AI: project={project_id}, location={location}")
+    logger.info("Initializing Vertex AI: project=%s, location=%s", project_id, location)
     aiplatform.init(project=project_id, location=location)
 
 
+@lru_cache(maxsize=8)
 def get_vertex_llm(project_id: str, location: str) -> ChatVertexAI:
     """
     Get a LangChain ChatVertexAI instance configured for document review.
 
+    Instances are cached per project and location so the client (and its
+    auth handshake) is reused across reviews, and Vertex AI is initialized
+    only once for each of them.
+
     Args:
         project_id: Google Cloud project ID
         location: Google Cloud location
@@ -59,6 +81,11 @@ def get_vertex_llm(project_id: str, location: str) -> ChatVertexAI:
     Returns:
         ChatVertexAI instance
     """
+    initialize_vertex_ai(
+        project_id=project_id,
+        location=location,
+    )
+
     logger.info("Creating ChatVertexAI instance for document review")
     return ChatVertexAI(
         model_name="gemini-1.5-flash-002",
@@ -68,113 +95,123 @@ def get_vertex_llm(project_id: str, location: str) -> ChatVertexAI:
     )
 
 
-def create_review_prompt(
-    document_images: list[str], schema: dict[str, Any]
-) -> ChatPromptTemplate:
+def _describe_document_pages(document_images: list[bytes]) -> tuple[list[bytes], str]:
     """
-    Create a LangChain ChatPromptTemplate for document review.
+    Drop pages identical to an earlier page and describe the page layout.
+
+    Repeated filler or blank pages cost prefill tokens without showing the
+    model anything new, but a repeated page is itself a formatting defect,
+    so the description tells the model the real page count and which pages
+    each sent image is, and which pages duplicate which.
+
+    Args:
+        document_images: JPEG-encoded pages in document order
+
+    Returns:
+        The unique pages in page order, and the description of the pages
+    """
+    first_pages: dict[bytes, int] = {}
+    duplicates: list[tuple[int, int]] = []
+    for page_number, document_image in enumerate(document_images, start=1):
+        first_page = first_pages.setdefault(document_image, page_number)
+        if first_page != page_number:
+            duplicates.append((page_number, first_page))
+
+    if len(document_images) == 1:
+        description = "The document has 1 page, shown below."
+    else:
+        page_numbers = ", ".join(str(page) for page in first_pages.values())
+        description = (
+            f"The document has {len(document_images)} pages. The images below "
+            f"are pages {page_numbers}, in that order."
+        )
+    if duplicates:
+        logger.info("Dropped %s duplicate pages", len(duplicates))
+        description += "".join(
+            f" Page {page} duplicates page {first_page} and is not shown."
+            for page, first_page in duplicates
+        )
+    return list(first_pages), description
+
+
+def create_review_messages(document_images: list[bytes]) -> list[BaseMessage]:
+    """
+    Create the messages for document review.
+
+    The images are handed to the model as multimodal message parts rather
+    than through a ChatPromptTemplate, so the multi-MB base64 strings are
+    not parsed and formatted as templates on every review; each page is
+    base64-encoded here, only once. Duplicate pages are sent once. The
+    static prompt comes first, then the per-request page description and
+    the images, keeping the prefix cacheable.
+
+    Args:
+        document_images: JPEG-encoded pages of the PDF
 
     Returns:
-        ChatPromptTemplate instance
+        List of messages for the review LLM
     """
 
-    logger.info("Creating review prompt")
-    logger.info(f"Document images: {len(document_images)} images")
+    logger.info("Creating review messages")
+    logger.info("Document images: %s images", len(document_images))
+    document_images, pages_description = _describe_document_pages(document_images)
 
     images_user_message = [
         {
             "type": "image_url",
             "image_url": {
-                "url": f"data:image/jpeg;base64,{document_image}",
+                "url": "data:image/jpeg;base64,"
+                + b64encode(document_image).decode("ascii"),
             },
         }
         for document_image in document_images
     ]
 
-    messages = [
-        SystemMessage(content=REVIEW_SYSTEM_PROMPT),
-        (
-            "user",
-            [
+    return [
+        _REVIEW_SYSTEM_MESSAGE,
+        HumanMessage(
+            content=[
                 {
                     "type": "text",
-                    "text": REVIEW_HUMAN_PROMPT.format(
-                        schema=dumps(schema, indent=2)
-                        .replace("{", "{{")
-                        .replace("}", "}}")
-                    ),
+                    "text": _REVIEW_INSTRUCTIONS,
+                },
+                {
+                    "type": "text",
+                    "text": pages_description,
                 },
             ]
             + images_user_message,
         ),
     ]
-    return ChatPromptTemplate.from_messages(messages)
 
 
 def create_joke_prompt() -> ChatPromptTemplate:
     """
-    Create a LangChain ChatPromptTemplate for generating cat jokes.
-
-    Returns:
-        ChatPromptTemplate instance
-    """
-    messages = [
-        ("system", CAT_JOKE_SYSTEM_PROMPT),
-        ("user", CAT_JOKE_HUMAN_PROMPT),
-    ]
-    return ChatPromptTemplate.from_messages(messages)
-
-
-def generate_cat_joke(llm: ChatVertexAI, issue_count: int) -> str:
-    """
-    Generate a sarcastic cat joke about formatting issues.
-
-    Args:
-        llm: ChatVertexAI instance
-        issue_count: Number of issues found
+    Get the LangChain ChatPromptTemplate for generating cat jokes.
 
     Returns:
-        Generated joke string
+        ChatPromptTemplate instance, shared across calls
     """
-    logger.info("Generating cat joke")
-    try:
-        prompt = create_joke_prompt()
-        response: str = (llm | StrOutputParser()).invoke(
-            prompt.format(issue_count=issue_count)
-        )
-        joke = response.strip()
-        logger.warning(f"Generated cat joke: {joke}")
-        return joke
-    except Exception as e:
-        logger.error(f"Failed to generate cat joke: {e}")
-        return "Meow, I tried to think of something witty, but I got distracted by a formatting error."
+    return _JOKE_PROMPT
 
 
+@lru_cache(maxsize=8)
 def review_feedback_chain(
     project_id: str,
     location: str,
 ) -> RunnableSerializable[ReviewFeedbackInput, FormatReview]:
-    # Initialize Vertex AI
-    initialize_vertex_ai(
-        project_id=project_id,
-        location=location,
-    )
-
-    # Get LLM and prompt
+    # Get LLM; in JSON mode Gemini's controlled generation answers with JSON
+    # matching the FormatReview schema instead of a forced tool call
     llm = get_vertex_llm(
         project_id=project_id,
         location=location,
-    ).with_structured_output(FormatReview)
-
-    prompt_generation = partial(
-        create_review_prompt, schema=FormatReview.model_json_schema()
-    )
+    ).with_structured_output(FormatReview, method="json_mode")
 
     # Invoke LLM
     logger.info("Invoking LLM for document review")
     review_feedback_chain: RunnableSerializable[ReviewFeedbackInput, FormatReview] = (
         RunnableLambda(
-            lambda inputs: prompt_generation(
+            lambda inputs: create_review_messages(
                 document_images=inputs["document_images"],
             )
         )
@@ -184,29 +221,21 @@ def review_feedback_chain(
     return review_feedback_chain
 
 
+@lru_cache(maxsize=8)
 def joke_chain(
     project_id: str, location: str
 ) -> RunnableSerializable[dict[str, Any], str]:
-    # Initialize Vertex AI
-    initialize_vertex_ai(
-        project_id=project_id,
-        location=location,
-    )
-
     llm = get_vertex_llm(
         project_id=project_id,
         location=location,
     )
 
+    # The prompt reads "review_feedback" straight from the input, so it is
+    # piped directly into the LLM without an intermediate mapping step
     prompt = create_joke_prompt()
 
     joke_chain: RunnableSerializable[dict[str, Any], str] = (
-        {
-            "review_feedback": itemgetter("review_feedback"),
-        }
-        | prompt
-        | llm
-        | StrOutputParser()
+        prompt | llm | StrOutputParser()
     )
 
     return joke_chain
@@ -9,7 +9,6 @@ import typer
 
 from criticat.models.config.app import JokeMode, ReviewConfig
 from criticat.models.models import VertexAIConfig
-from criticat.use_cases.review import ReviewPDF
 
 
 # Configure logging
@@ -56,6 +55,10 @@ def review(
     logger.info(f"Starting Criticat review for {pdf_path}")
 
     try:
+        # Imported here so --help and option errors do not pay for loading
+        # LangGraph and the Vertex AI SDK
+        from criticat.use_cases.review import ReviewPDF
+
         # Create config
         config = ReviewConfig(
             pdf_path=pdf_path,
@@ -71,9 +74,9 @@ def review(
             ]
         )
 
-        review_use_case._run(
-            config=config.model_dump(),
-        )
+        # Hand the validated model over as is, rather than dumping it to a
+        # dict that the use case would validate again
+        review_use_case._run(config=config)
 
         logger.info("Review completed successfully")
     except Exception as e:
@@ -3,13 +3,17 @@ Context Model Protocol (CMP) server implementation for Criticat.
 Uses the MCP framework to provide tools and resources.
 """
 
+from functools import lru_cache
 import logging
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any
 
 from mcp.server.fastmcp import FastMCP
 
-from criticat.models import CriticatConfig, JokeMode
-from criticat.flow import run_review_graph
+from criticat.models.config.app import ReviewConfig
+from criticat.models.models import VertexAIConfig
+
+if TYPE_CHECKING:
+    from criticat.use_cases.review import ReviewPDF
 
 
 logger = logging.getLogger(__name__)
@@ -18,50 +22,68 @@ logger = logging.getLogger(__name__)
 mcp = FastMCP(name="Criticat")
 
 
+@lru_cache(maxsize=8)
+def get_review_use_case(project_id: str, location: str) -> "ReviewPDF":
+    """
+    Get the review use case for a Vertex AI project and location.
+
+    Use cases are cached so that repeated tool calls share the LLM chains
+    and the compiled review graph instead of rebuilding them per call.
+
+    Args:
+        project_id: Google Cloud project ID
+        location: Google Cloud location
+
+    Returns:
+        ReviewPDF instance
+    """
+    # Imported on first use so the server starts, and answers tool listings,
+    # without waiting for LangGraph and the Vertex AI SDK to load
+    from criticat.use_cases.review import ReviewPDF
+
+    return ReviewPDF(
+        provider_configs=[
+            VertexAIConfig(
+                project_id=project_id,
+                location=location,
+            ),
+        ]
+    )
+
+
 # Register the review tool
 @mcp.tool()
-def review(
+async def review(
     pdf_path: str,
     project_id: str,
     location: str = "us-central1",
-    github_token: str = "",
-    repository: str = "",
-    pr_number: int = 0,
     joke_mode: str = "default",
 ) -> Dict[str, Any]:
     """
-    Review a PDF document and comment on GitHub PR if issues are found.
+    Review a PDF document for formatting issues.
 
     Args:
         pdf_path: Path to the PDF file to review
         project_id: Google Cloud project ID
         location: Google Cloud location
-        github_token: GitHub token for API access
-        repository: GitHub repository in format owner/repo
-        pr_number: Pull request number to comment on
         joke_mode: Mode for injecting cat jokes (none, default, chaotic)
 
     Returns:
         Review results
     """
-    logger.info(f"MCP review tool called for PDF: {pdf_path}")
+    logger.info("MCP review tool called for PDF: %s", pdf_path)
 
-    # Convert joke_mode string to enum
-    joke_mode_enum = JokeMode(joke_mode)
-
-    # Create configuration
-    config = CriticatConfig(
+    # Create configuration; FastMCP has already validated the tool arguments,
+    # so the model is handed to the graph as is instead of being dumped
+    config = ReviewConfig(
         pdf_path=pdf_path,
-        project_id=project_id,
-        location=location,
-        github_token=github_token,
-        repository=repository,
-        pr_number=pr_number,
-        joke_mode=joke_mode_enum,
+        joke_mode=joke_mode,
     )
 
+    review_use_case = get_review_use_case(project_id=project_id, location=location)
+
     # Run review
-    result = run_review_graph(config.model_dump())
+    final_state = await review_use_case._arun(config=config)
 
     # Return results
-    return result
+    return final_state["review"].model_dump(mode="json")
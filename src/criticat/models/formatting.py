@@ -49,13 +49,11 @@ class FormatReview(BaseModel):
     )
 
     def has_issues(self) -> bool:
-        for category in self.categories:
-            if any(issue.status in ["error", "warning"] for issue in category.issues):
-                return True
-        return False
+        return any(
+            issue.status in ("error", "warning")
+            for category in self.categories
+            for issue in category.issues
+        )
 
     def issue_count(self) -> int:
-        count = 0
-        for category in self.categories:
-            count += len(category.issues)
-        return count
+        return sum(len(category.issues) for category in self.categories)
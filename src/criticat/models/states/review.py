@@ -6,8 +6,12 @@ from criticat.models.formatting import FormatReview
 class ReviewState(BaseModel):
     """State for the review process."""
 
-    document_images: list[str] = Field(
-        default_factory=list, description="List of base64-encoded images of the PDF"
+    document_ref: str | None = Field(
+        default=None,
+        exclude=True,
+        description=(
+            "Handle to the JPEG-encoded pages of the PDF, kept outside the state"
+        ),
     )
     review_feedback: dict[str, FormatReview] = Field(
         default_factory=dict, description="LLM feedback on the document"
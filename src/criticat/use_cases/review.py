@@ -3,25 +3,35 @@ LangGraph flow implementation for Criticat.
 Defines the document review workflow as a graph of nodes.
 """
 
+import asyncio
+from functools import cached_property
 import logging
 from pathlib import Path
 import random
-from typing import Dict, Any, TypedDict
+import threading
+from typing import Any, Callable, Dict, TypedDict
 
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel
 
-from criticat.document import extract_document_image
+from criticat.document import (
+    aextract_document_image,
+    discard_document_images,
+    new_document_ref,
+    pop_document_images,
+    store_document_images,
+)
 from criticat.infrastructure.llms.vertex_ai import (
     joke_chain,
     review_feedback_chain,
 )
 
 # from criticat.infrastructure.github.pull_request import comment_on_pr, format_pr_comment
-from criticat.models.config.app import JokeMode
+from criticat.models.config.app import JokeMode, ReviewConfig
 from criticat.models.formatting import FormatReview
 from criticat.models.models import VertexAIConfig
-from criticat.models.states.control import ControlState
+from criticat.models.states.control import ControlState, ControllableConfig
+from criticat.models.states.review import ReviewState
 from langgraph.graph.state import CompiledStateGraph
 from langchain_core.runnables import RunnableSerializable
 
@@ -29,194 +39,328 @@ from langchain_core.runnables import RunnableSerializable
 logger = logging.getLogger(__name__)
 
 
+# Reviews running at the same time all write the same report file; writes
+# are serialized so they never interleave.
+_REPORT_LOCK = threading.Lock()
+
+
+def _write_report(report_path: Path, report: str) -> None:
+    """
+    Write the review report to disk.
+
+    Runs on a background (non-daemon) thread so the graph does not wait on
+    disk I/O, while the interpreter still waits for the write on exit.
+    Failures are logged, since nothing joins the thread to see them.
+
+    Args:
+        report_path: Destination file of the report
+        report: Serialized review state
+    """
+    try:
+        with _REPORT_LOCK:
+            report_path.parent.mkdir(exist_ok=True)
+            report_path.write_text(report)
+    except OSError as e:
+        logger.error("Failed to write review report to %s: %s", report_path, e)
+
+
+# Event loop that runs every synchronous review. The cached Vertex AI
+# clients bind their async transport to the loop they are first used on,
+# so all reviews must share one loop rather than get a fresh one each.
+_SYNC_LOOP: asyncio.AbstractEventLoop | None = None
+_SYNC_LOOP_LOCK = threading.Lock()
+
+
+def _sync_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the long-lived event loop of synchronous reviews, starting it once.
+
+    The loop runs on a daemon thread for the lifetime of the process.
+
+    Returns:
+        Running event loop
+    """
+    global _SYNC_LOOP
+    with _SYNC_LOOP_LOCK:
+        if _SYNC_LOOP is None:
+            _SYNC_LOOP = asyncio.new_event_loop()
+            threading.Thread(
+                target=_SYNC_LOOP.run_forever, name="criticat-loop", daemon=True
+            ).start()
+        return _SYNC_LOOP
+
+
+# Number of jokes to request from a provider, given its review feedback:
+# none in NONE mode, one per review with issues in DEFAULT mode and 1-3
+# regardless of the outcome in CHAOTIC mode.
+_JOKE_COUNTS: dict[JokeMode, Callable[[FormatReview], int]] = {
+    JokeMode.NONE: lambda review_feedback: 0,
+    JokeMode.DEFAULT: lambda review_feedback: int(review_feedback.has_issues()),
+    JokeMode.CHAOTIC: lambda review_feedback: random.randint(1, 3),
+}
+
+
 class ReviewProvider(TypedDict):
     review: RunnableSerializable
     joke: RunnableSerializable
 
 
+def _vertex_ai_provider(provider_config: VertexAIConfig) -> ReviewProvider:
+    """
+    Build the review and joke runnables of a Vertex AI provider.
+
+    Args:
+        provider_config: Vertex AI provider configuration
+
+    Returns:
+        Review and joke runnables of the provider
+    """
+    return {
+        "review": review_feedback_chain(
+            project_id=provider_config.project_id,
+            location=provider_config.location,
+        ),
+        "joke": joke_chain(
+            project_id=provider_config.project_id,
+            location=provider_config.location,
+        ),
+    }
+
+
+def _generic_provider(provider_config: Any) -> ReviewProvider:
+    """
+    Build the runnables of a provider whose configuration creates them.
+
+    Args:
+        provider_config: Provider configuration exposing review/joke factories
+
+    Returns:
+        Review and joke runnables of the provider
+    """
+    provider: ReviewProvider = {}
+    settings = provider_config.model_dump()
+    if hasattr(provider_config, "review") and callable(provider_config.review):
+        provider["review"] = provider_config.review(**settings)
+    if hasattr(provider_config, "joke") and callable(provider_config.joke):
+        provider["joke"] = provider_config.joke(**settings)
+    return provider
+
+
+# Provider builders by configuration type; any other configuration is
+# expected to build its own runnables
+_PROVIDER_BUILDERS: dict[type[BaseModel], Callable[[Any], ReviewProvider]] = {
+    VertexAIConfig: _vertex_ai_provider,
+}
+
+
+def _provider_builder(provider_config: Any) -> Callable[[Any], ReviewProvider]:
+    """
+    Get the builder of a provider configuration.
+
+    Subclasses of a registered configuration type use the builder of their
+    closest registered base.
+
+    Args:
+        provider_config: Provider configuration
+
+    Returns:
+        Builder of the provider runnables
+    """
+    for config_type in type(provider_config).__mro__:
+        if config_type in _PROVIDER_BUILDERS:
+            return _PROVIDER_BUILDERS[config_type]
+    return _generic_provider
+
+
 class ReviewPDF:
     def __init__(self, provider_configs: list[BaseModel]):
+        """
+        Build the review runnables of every provider.
+
+        Args:
+            provider_configs: Provider configurations, each with an llm_provider name
+
+        Raises:
+            ValueError: If a configuration names no provider or builds no review
+                runnable, or if no configuration is given
+        """
         self._providers_config: dict[str, VertexAIConfig | BaseModel] = {}
         self._providers: dict[str, ReviewProvider] = {}
+        # Resolved once, against the working directory at construction
+        self._report_path = (
+            Path("./reports").absolute().resolve() / "criticat_feedback.json"
+        )
 
         for provider_config in provider_configs:
-            if hasattr(provider_config, "llm_provider"):
-                self._providers[provider_config.llm_provider] = {}
-                if isinstance(provider_config, VertexAIConfig):
-                    self._providers_config[provider_config.llm_provider] = (
-                        provider_config
-                    )
-                    self._providers[provider_config.llm_provider]["review"] = (
-                        review_feedback_chain(
-                            project_id=provider_config.project_id,
-                            location=provider_config.location,
-                        )
-                    )
-                    self._providers[provider_config.llm_provider]["joke"] = joke_chain(
-                        project_id=provider_config.project_id,
-                        location=provider_config.location,
-                    )
-                elif hasattr(provider_config, "llm_provider") and isinstance(
-                    provider_config.llm_provider, str
-                ):
-                    self._providers_config[provider_config.llm_provider] = (
-                        provider_config
-                    )
-                    if hasattr(provider_config, "review") and callable(
-                        provider_config.review
-                    ):
-                        self._providers[provider_config.llm_provider]["review"] = (
-                            provider_config.review(**provider_config.model_dump())
-                        )
-                    if hasattr(provider_config, "joke") and callable(
-                        provider_config.joke
-                    ):
-                        self._providers[provider_config.llm_provider]["joke"] = (
-                            provider_config.joke(**provider_config.model_dump())
-                        )
-
-    def extract_text_node(self, state: ControlState) -> ControlState:
+            llm_provider = getattr(provider_config, "llm_provider", None)
+            if not isinstance(llm_provider, str):
+                raise ValueError(
+                    f"{type(provider_config).__name__} has no llm_provider name"
+                )
+            provider = _provider_builder(provider_config)(provider_config)
+            if "review" not in provider:
+                raise ValueError(
+                    f"{type(provider_config).__name__} provides no review runnable"
+                )
+            self._providers_config[llm_provider] = provider_config
+            self._providers[llm_provider] = provider
+
+        if not self._providers:
+            raise ValueError("At least one provider configuration is required")
+
+    async def extract_text_node(self, state: ControlState) -> ControlState:
         """
         Extract text from PDF document.
 
         Args:
-            state: LangGraph state dictionary
+            state: Review graph state, already validated by LangGraph
 
         Returns:
-            Updated state dictionary
+            Updated state
         """
         logger.info("Running extract_text_node")
-        flow_state = ControlState.model_validate(state)
-
         # Convert PDF to image
-        document_images = extract_document_image(flow_state.app_config.pdf_path)
-        flow_state.review.document_images = document_images
+        document_images = await aextract_document_image(state.app_config.pdf_path)
+        assert state.review.document_ref is not None, "Document handle is required"
+        store_document_images(state.review.document_ref, document_images)
 
         logger.info("Successfully extracted document image from PDF")
-        return flow_state
-
-    def review_llm_node(self, state: ControlState) -> ControlState:
+        return state
+
+    async def _review_with_provider(
+        self,
+        provider_name: str,
+        provider: ReviewProvider,
+        document_images: list[bytes],
+        joke_mode: JokeMode,
+    ) -> tuple[FormatReview, list[str]]:
         """
-        Review document using LLM.
+        Review the document with one provider and generate its jokes.
+
+        The jokes are requested concurrently as soon as this provider's
+        review is available, without waiting for the other providers.
 
         Args:
-            state: LangGraph state dictionary
+            provider_name: Name of the provider
+            provider: Review and joke runnables of the provider
+            document_images: JPEG-encoded pages of the PDF
+            joke_mode: Mode for injecting cat jokes
 
         Returns:
-            Updated state dictionary
+            Review feedback and jokes of the provider
         """
-        logger.info("Running review_llm_node")
-        flow_state = ControlState.model_validate(state)
+        review_feedback: FormatReview = await provider["review"].ainvoke(
+            input={
+                "document_images": document_images,
+            }
+        )
 
-        assert (
-            flow_state.review.document_images is not None
-        ), "Document images are required"
+        # Handle jokes based on joke mode
+        joke_count = _JOKE_COUNTS[joke_mode](review_feedback)
+        logger.info(
+            "Joke mode %s: adding %s jokes for %s",
+            joke_mode.value,
+            joke_count,
+            provider_name,
+        )
+        joke_input = {"review_feedback": review_feedback}
+        jokes = await asyncio.gather(
+            *[provider["joke"].ainvoke(input=joke_input) for _ in range(joke_count)]
+        )
 
-        for provider_name, provider in self._providers.items():
-            review_feedback: FormatReview = provider["review"].invoke(
-                input={
-                    "document_images": flow_state.review.document_images,
-                }
-            )
+        return review_feedback, list(jokes)
 
-            flow_state.review.review_feedback[provider_name] = review_feedback
+    async def review_llm_node(self, state: ControlState) -> ControlState:
+        """
+        Review document using LLM.
 
-        # Handle jokes based on joke mode
-        joke_mode = flow_state.app_config.joke_mode
-        for provider_name, provider in self._providers.items():
-            if joke_mode == JokeMode.CHAOTIC:
-                # In chaotic mode, always add 1-3 jokes
-                joke_count = random.randint(1, 3)
-                logger.warning(f"Chaotic mode activated: adding {joke_count} jokes")
-                for _ in range(joke_count):
-                    joke = provider["joke"].invoke(
-                        input={
-                            "review_feedback": flow_state.review.review_feedback[
-                                provider_name
-                            ]
-                        }
-                    )
-                    flow_state.review.jokes.append(joke)
-            elif (
-                joke_mode == JokeMode.DEFAULT
-                and flow_state.review.review_feedback[provider_name].has_issues()
-            ):
-                # In default mode, add 1 joke if issues were found
-                logger.info("Default mode: adding 1 joke for found issues")
-                joke = provider["joke"].invoke(
-                    input={
-                        "review_feedback": flow_state.review.review_feedback[
-                            provider_name
-                        ]
-                    }
-                )
-                flow_state.review.jokes.append(joke)
-            elif joke_mode == JokeMode.NONE:
-                logger.info("Joke mode is set to NONE, no jokes will be added")
+        All providers run concurrently, each one requesting its jokes as soon
+        as its own review is in, so the node waits for the slowest
+        review-then-jokes pipeline rather than for every call in turn.
 
-        reports_path = Path("./reports").absolute().resolve()
-        reports_path.mkdir(exist_ok=True)
+        Args:
+            state: Review graph state, already validated by LangGraph
+
+        Returns:
+            Updated state
+        """
+        logger.info("Running review_llm_node")
+        assert state.review.document_ref is not None, "Document images are required"
+        document_images = pop_document_images(state.review.document_ref)
+        state.review.document_ref = None
+
+        joke_mode = state.app_config.joke_mode
+        results = await asyncio.gather(
+            *[
+                self._review_with_provider(
+                    provider_name, provider, document_images, joke_mode
+                )
+                for provider_name, provider in self._providers.items()
+            ]
+        )
+        state.review.review_feedback = {
+            provider_name: review_feedback
+            for provider_name, (review_feedback, _) in zip(self._providers, results)
+        }
+        state.review.jokes.extend(joke for _, jokes in results for joke in jokes)
 
-        with Path(reports_path / "criticat_feedback.json").open("w") as f:
-            f.write(
-                flow_state.review.model_dump_json(indent=2, exclude={"document_images"})
-            )
+        indent = 2 if logger.isEnabledFor(logging.DEBUG) else None
+        threading.Thread(
+            target=_write_report,
+            args=(
+                self._report_path,
+                state.review.model_dump_json(indent=indent),
+            ),
+            name="criticat-report",
+        ).start()
 
-        return flow_state
+        return state
 
     def comment_pr_node(self, state: ControlState) -> ControlState:
         """
         Comment on PR if issues were found.
 
         Args:
-            state: LangGraph state dictionary
+            state: Review graph state, already validated by LangGraph
 
         Returns:
-            Updated state dictionary
+            Updated state
         """
         logger.info("Running comment_pr_node")
-        flow_state = ControlState.model_validate(state)
-
-        if False:
-            logger.info("Issues found, commenting on PR")
-            # Format PR comment
-            # comment_body = format_pr_comment(
-            #     review_feedback=flow_state.state.review_feedback
-            #     if flow_state.state.review_feedback
-            #     else "",
-            #     jokes=flow_state.state.jokes,
-            # )
-
-            # # Create payload
-            # payload = PRCommentPayload(
-            #     repository=flow_state.config.repository,
-            #     pr_number=flow_state.config.pr_number,
-            #     body=comment_body,
-            #     github_token=flow_state.config.github_token,
-            # )
-
-            # # Comment on PR
-            # comment_on_pr(payload)
-        else:
-            logger.info("No issues found, skipping PR comment")
-
-        return flow_state
+        # PR comments are not wired yet; once they are, this will:
+        # comment_body = format_pr_comment(
+        #     review_feedback=flow_state.state.review_feedback
+        #     if flow_state.state.review_feedback
+        #     else "",
+        #     jokes=flow_state.state.jokes,
+        # )
+
+        # # Create payload
+        # payload = PRCommentPayload(
+        #     repository=flow_state.config.repository,
+        #     pr_number=flow_state.config.pr_number,
+        #     body=comment_body,
+        #     github_token=flow_state.config.github_token,
+        # )
+
+        # # Comment on PR
+        # comment_on_pr(payload)
+        logger.info("Skipping PR comment")
+
+        return state
 
     def should_comment_on_pr(self, state: ControlState) -> str:
         """
         Determine if we should comment on the PR.
 
+        PR comments are not wired yet, so the review always ends here.
+
         Args:
-            state: LangGraph state dictionary
+            state: Review graph state, already validated by LangGraph
 
         Returns:
             Next node name
         """
-        flow_state = ControlState.model_validate(state)
-        if not flow_state.providers_config.git_provider:
-            return END
-        if False:
-            return "comment_pr"
         return END
 
     def create_review_graph(self) -> CompiledStateGraph:
@@ -247,29 +391,59 @@ class ReviewPDF:
         # Compile graph
         return builder.compile()
 
-    def _run(self, config: Dict[str, Any]) -> Dict[str, Any]:
+    @cached_property
+    def _graph(self) -> CompiledStateGraph:
+        """
+        Compiled review graph, built on first use and reused across runs.
+        """
+        return self.create_review_graph()
+
+    async def _arun(self, config: ReviewConfig) -> Dict[str, Any]:
         """
         Run the document review graph with the given configuration.
 
         Args:
-            config: Configuration dictionary
+            config: Validated review configuration
 
         Returns:
             Final state dictionary
         """
-        # Create initial state
-        initial_state = {
-            "app_config": config,
-            "providers_config": {"git_provider": config.get("git_provider", None)},
-            "review": {"document_images": [], "review_feedback": {}, "jokes": []},
-        }
-
-        # Create graph
-        graph = self.create_review_graph()
+        # The page images live outside the state under this handle; it is
+        # created up front so they are released even if the graph fails or
+        # is cancelled before review_llm_node takes them
+        document_ref = new_document_ref()
+
+        # Create initial state; every field is an already valid model, so
+        # the state is assembled without running validation again
+        initial_state = ControlState.model_construct(
+            app_config=config,
+            providers_config=ControllableConfig(),
+            review=ReviewState(document_ref=document_ref),
+        )
 
         # Run graph
         logger.info("Starting document review graph")
-        final_state = graph.invoke(ControlState(**initial_state))
+        try:
+            final_state = await self._graph.ainvoke(initial_state)
+        finally:
+            discard_document_images(document_ref)
         logger.info("Document review graph completed")
 
         return final_state
+
+    def _run(self, config: ReviewConfig) -> Dict[str, Any]:
+        """
+        Run the document review graph from synchronous code.
+
+        The graph runs on the shared synchronous review loop, so repeated
+        calls keep reusing the cached provider clients.
+
+        Args:
+            config: Validated review configuration
+
+        Returns:
+            Final state dictionary
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._arun(config=config), _sync_loop()
+        ).result()
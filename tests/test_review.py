@@ -0,0 +1,57 @@
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+import pytest
+from pydantic import BaseModel
+
+from criticat import document
+from criticat.models.config.app import ReviewConfig
+from criticat.use_cases import review
+from criticat.use_cases.review import ReviewPDF
+
+
+class UnnamedConfig(BaseModel):
+    llm_provider: None = None
+
+
+class NoReviewConfig(BaseModel):
+    llm_provider: str = "no-review"
+
+
+class ReviewingConfig(BaseModel):
+    llm_provider: str = "reviewing"
+
+    def review(self, **kwargs):
+        return RunnableLambda(lambda inputs: None)
+
+
+@pytest.mark.parametrize(
+    ("provider_configs", "message"),
+    [
+        ([UnnamedConfig()], "UnnamedConfig has no llm_provider name"),
+        ([NoReviewConfig()], "NoReviewConfig provides no review runnable"),
+        ([], "At least one provider configuration is required"),
+    ],
+)
+def test_review_pdf_rejects_configs_without_a_usable_provider(
+    provider_configs, message
+):
+    with pytest.raises(ValueError, match=message):
+        ReviewPDF(provider_configs=provider_configs)
+
+
+def test_review_pdf_releases_page_images_when_the_review_fails(monkeypatch):
+    async def extract_pages(pdf_path):
+        return [b"page"]
+
+    async def fail_review(self, state):
+        raise RuntimeError("review failed")
+
+    monkeypatch.setattr(review, "aextract_document_image", extract_pages)
+    monkeypatch.setattr(ReviewPDF, "review_llm_node", fail_review)
+    review_use_case = ReviewPDF(provider_configs=[ReviewingConfig()])
+
+    with pytest.raises(RuntimeError, match="review failed"):
+        asyncio.run(review_use_case._arun(config=ReviewConfig(pdf_path="doc.pdf")))
+
+    assert document._IMAGE_STORE == {}